@@ -1,85 +1,83 @@
 import pandas as pd
 import numpy as np
-import copy
 # Import the engine we built in Phase 2
-from tnuos_engine import calculate_portfolio_impact, determine_tcr_band
+from tnuos_engine import calculate_portfolio_impact, HH_BAND_LIMITS, NHH_BAND_LIMITS
 
 class ScenarioModeler:
     def __init__(self, sites_df, year):
         self.baseline_sites = sites_df.copy()
         self.year = year
+        self._baseline_result = None
+
+    def _baseline_result_df(self):
+        """
+        Returns the engine result for the baseline sites, calculated once per modeler.
+        """
+        if self._baseline_result is None:
+            self._baseline_result = calculate_portfolio_impact(self.baseline_sites, target_year=self.year)
+        return self._baseline_result
 
     def identify_band_drop_opportunities(self):
         """
         Identifies sites that are within 20% of a lower band threshold.
         """
-        opportunities = []
-
         # TCR thresholds:
         # The value represents the UPPER LIMIT of the lower band.
         # Example: To drop from Band 4 to Band 3, you must get below the Band 3 limit.
+        # Indexed by tcr_band category code (Band 1..4, Unclassified), so Band 1
+        # and Unclassified have no target.
+        def targets_by_band(limits):
+            return np.array([np.nan, *limits, np.nan])
 
-        tcr_thresholds = {
-            # LARGE USAGE HH (Uses Agreed Capacity kVA)
-            'HH': {
-                'LV': {'Band 4': 231, 'Band 3': 150, 'Band 2': 80},
-                'HV': {'Band 4': 1800, 'Band 3': 1000, 'Band 2': 422},
-                'EHV': {'Band 4': 21500, 'Band 3': 12000, 'Band 2': 5000}
-            },
-            # NHH & SMALL HH (Uses Annual Consumption kWh)
-            'NHH': {
-                'ALL': {'Band 4': 25279, 'Band 3': 12553, 'Band 2': 3571}
-            }
-        }
+        # LARGE USAGE HH (Uses Agreed Capacity kVA)
+        hh_targets = {volt: targets_by_band(limits) for volt, limits in HH_BAND_LIMITS.items()}
+        # NHH & SMALL HH (Uses Annual Consumption kWh)
+        nhh_targets = targets_by_band(NHH_BAND_LIMITS)
 
         # Run calculation on baseline to establish Current Band
-        df_res = calculate_portfolio_impact(self.baseline_sites, target_year=self.year)
-
-        for index, row in df_res.iterrows():
-            # Extract Site Context
-            volt = row.get('voltage_level', 'LV')
-            meter = row.get('meter_type', 'HH')
-            current_band = row.get('tcr_band')
-
-            # Initialize analysis variables
-            metric_value = 0
-            metric_unit = ""
-            threshold_map = None
-
-            # 2. Determine Strategy (Capacity vs Consumption)
-            if meter == 'HH':
-                metric_value = row['agreed_capacity_kva']
-                metric_unit = "kVA"
-                if volt in tcr_thresholds['HH']:
-                    threshold_map = tcr_thresholds['HH'][volt]
+        df_res = self._baseline_result_df()
+        if isinstance(df_res, str):
+            return df_res # Error message (no tariffs for this year)
 
-            elif meter == 'NHH':
-                metric_value = row['annual_consumption_kwh']
-                metric_unit = "kWh"
-                threshold_map = tcr_thresholds['NHH']['ALL']
+        band_code = df_res['tcr_band'].cat.codes.to_numpy()
+        hh_mask = (df_res['meter_type'] == 'HH').to_numpy()
+        nhh_mask = (df_res['meter_type'] == 'NHH').to_numpy()
 
-            # 3. Analyze for Band Drop
-            # We only analyze if we found a valid map and the band is droppable (i.e., not already Band 1)
-            if threshold_map and current_band in threshold_map:
-                target_val = threshold_map[current_band]
+        # 2. Determine Strategy (Capacity vs Consumption)
+        metric_value = np.where(
+            hh_mask,
+            df_res['agreed_capacity_kva'].to_numpy(dtype=np.float64, na_value=np.nan),
+            df_res['annual_consumption_kwh'].to_numpy(dtype=np.float64, na_value=np.nan),
+        )
+        metric_unit = np.where(hh_mask, 'kVA', 'kWh')
 
-                # Logic:
-                # If current value is ABOVE target, but within 20% (1.2x) of it,
-                # it is an "Opportunity".
-                upper_limit_check = target_val * 1.2
+        target_val = np.full(len(df_res), np.nan)
+        for volt, targets in hh_targets.items():
+            mask = hh_mask & (df_res['voltage_level'] == volt).to_numpy()
+            target_val[mask] = targets[band_code[mask]]
+        target_val[nhh_mask] = nhh_targets[band_code[nhh_mask]]
 
-                if target_val < metric_value <= upper_limit_check:
-                    reduction_needed = metric_value - target_val
+        # 3. Analyze for Band Drop
+        # If current value is ABOVE target, but within 20% (1.2x) of it,
+        # it is an "Opportunity". Sites without a target (NaN) never match.
+        upper_limit_check = target_val * 1.2
+        opp_mask = (target_val < metric_value) & (metric_value <= upper_limit_check)
 
-                    # Calculate % reduction for context
-                    pct_reduction = (reduction_needed / metric_value) * 100
+        # Only format the (small) set of opportunities
+        metric_value = metric_value[opp_mask]
+        metric_unit = metric_unit[opp_mask]
+        target_val = target_val[opp_mask]
+        reduction_needed = metric_value - target_val
 
-                    opportunities.append({
-                        'Site ID': row['site_id'],
-                        'Current Band': current_band,
-                        'Current Level': f"{metric_value:,.0f} {metric_unit}",
-                        'Target Level': f"{target_val:,.0f} {metric_unit}",
-                        'Reduction Needed': f"{reduction_needed:,.1f} {metric_unit} ({pct_reduction:.1f}%)",
-                    })
+        # Calculate % reduction for context
+        pct_reduction = (reduction_needed / metric_value) * 100
 
-        return pd.DataFrame(opportunities)
+        return pd.DataFrame({
+            'Site ID': df_res['site_id'].to_numpy()[opp_mask],
+            'Current Band': df_res['tcr_band'].astype(str).to_numpy()[opp_mask],
+            'Current Level': [f"{v:,.0f} {u}" for v, u in zip(metric_value, metric_unit)],
+            'Target Level': [f"{t:,.0f} {u}" for t, u in zip(target_val, metric_unit)],
+            'Reduction Needed': [
+                f"{r:,.1f} {u} ({p:.1f}%)" for r, u, p in zip(reduction_needed, metric_unit, pct_reduction)
+            ],
+        })
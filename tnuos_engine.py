@@ -1,7 +1,21 @@
+import bisect
+import functools
+import os
+
+import numpy as np
 import pandas as pd
 
 # SITE CLASSIFICATION LOGIC
 
+# Upper limits of Bands 1-3 (anything above the last limit is Band 4)
+NHH_BAND_LIMITS = (3571, 12553, 25279)
+HH_BAND_LIMITS = {
+    'LV': (80, 150, 231),        # 232 kVA and above is Band 4
+    'HV': (422, 1000, 1800),     # 1801 kVA and above is Band 4
+    'EHV': (5000, 12000, 21500), # 21501 kVA and above is Band 4
+}
+BAND_LABELS = np.array(['Band 1', 'Band 2', 'Band 3', 'Band 4', 'Unclassified'])
+
 def determine_tcr_band(row):
     """
     Classifies a site into TCR Bands 1-4 based on current UK regulations.
@@ -20,76 +34,104 @@ def determine_tcr_band(row):
     # A: NON-HALF-HOURLY (NHH) & SMALL-USAGE HALF-HOURLY: This uses annual consumption in kWh
     # Assume this if the meter is NHH, or if it's HH but explicitly flagged as 'Small Usage'
     # Trigger this if Capacity is 0/Null but Consumption exists
-
+    # bisect_left keeps a value equal to a limit in the lower band (<=)
     if meter_type == 'NHH' or (meter_type == 'HH' and capacity == 0):
-        if consumption <= 3571:
-            return 'Band 1'
-        elif consumption <= 12553:
-            return 'Band 2'
-        elif consumption <= 25279:
-            return 'Band 3'
-        else:
-            return 'Band 4'
+        return str(BAND_LABELS[bisect.bisect_left(NHH_BAND_LIMITS, consumption)])
 
     # B: LARGE USAGE HALF-HOURLY (HH): This uses capacity in kVA
-    # Low Voltage (LV)
-    if voltage == 'LV':
-        if capacity <= 80:
-            return 'Band 1'
-        elif capacity <= 150:
-            return 'Band 2'
-        elif capacity <= 231:
-            return 'Band 3'
-        else:
-            return 'Band 4' # 232 kVA and above
-
-    # High Voltage (HV)
-    elif voltage == 'HV':
-        if capacity <= 422:
-            return 'Band 1'
-        elif capacity <= 1000:
-            return 'Band 2'
-        elif capacity <= 1800:
-            return 'Band 3'
-        else:
-            return 'Band 4' # 1801 kVA and above
-
-    # Extra High Voltage (EHV)
-    elif voltage == 'EHV':
-        if capacity <= 5000:
-            return 'Band 1'
-        elif capacity <= 12000:
-            return 'Band 2'
-        elif capacity <= 21500:
-            return 'Band 3'
-        else:
-            return 'Band 4' # 21501 kVA and above
+    limits = HH_BAND_LIMITS.get(voltage)
+    if limits is not None:
+        return str(BAND_LABELS[bisect.bisect_left(limits, capacity)])
 
     return 'Unclassified'
 
-def generate_tdr_lookup_key(row):
+# Fixed categories for the repeated string columns
+VOLTAGE_DTYPE = pd.CategoricalDtype(['LV', 'HV', 'EHV'])
+METER_DTYPE = pd.CategoricalDtype(['HH', 'NHH'])
+BAND_DTYPE = pd.CategoricalDtype(list(BAND_LABELS))
+
+def _band_codes(capacity, consumption, meter_code, volt_code):
     """
-    Translates the calculated Band + Voltage into the specific Key string
-    found in the NESO TDR CSV (e.g., 'LV1', 'LV_NoMIC_2').
+    Band index per site into BAND_LABELS, from NaN-free capacity/consumption
+    arrays and METER_DTYPE / VOLTAGE_DTYPE category codes (-1 = unknown).
     """
-    band = row['tcr_band'] # e.g. "Band 1"
-    voltage = str(row['voltage_level']).upper()
-    meter = str(row['meter_type']).upper()
-    capacity = row.get('agreed_capacity_kva', 0)
+    # Default to 'Unclassified' (last label)
+    band_code = np.full(len(capacity), len(BAND_LABELS) - 1, dtype=np.int8)
 
-    if band == 'Unclassified':
-        return None
+    # A: NHH & small-usage HH -> consumption based
+    # side='left' so a value equal to a limit stays in the lower band (<=)
+    is_hh = meter_code == METER_DTYPE.categories.get_loc('HH')
+    is_nhh = meter_code == METER_DTYPE.categories.get_loc('NHH')
+    nhh_mask = is_nhh | (is_hh & (capacity == 0))
+    band_code[nhh_mask] = np.searchsorted(NHH_BAND_LIMITS, consumption[nhh_mask], side='left')
 
-    band_num = band.split(' ')[-1] # Get '1' from 'Band 1'
+    # B: Large-usage HH -> capacity based, per voltage level
+    for code, volt in enumerate(VOLTAGE_DTYPE.categories):
+        mask = ~nhh_mask & (volt_code == code)
+        band_code[mask] = np.searchsorted(HH_BAND_LIMITS[volt], capacity[mask], side='left')
 
-    # 1. NHH and small HH usage (consumption) path
-    # Matches CSV keys: 'LV_NoMIC_1', 'LV_NoMIC_2'...
-    if meter == 'NHH' or (meter == 'HH' and (pd.isna(capacity) or capacity == 0)):
-        return f"LV_NoMIC_{band_num}"
+    return band_code
 
-    # 2. Large HH usage (capacity) path
-    # Matches CSV keys: 'LV1', 'HV3', 'EHV4'
-    return f"{voltage}{band_num}"
+def _normalize_labels(series):
+    """
+    Stripped, upper-cased labels. Columns already normalised by
+    normalize_site_inputs are returned as-is, so the string work happens once.
+    """
+    if series.dtype in (VOLTAGE_DTYPE, METER_DTYPE):
+        return series
+    return series.astype(str).str.strip().str.upper()
+
+def _to_categorical(series, dtype):
+    """
+    Normalised labels as a Categorical of dtype. Labels outside its categories
+    are blanked to NaN first (pandas is deprecating the implicit conversion).
+    """
+    labels = _normalize_labels(series)
+    return pd.Categorical(labels.where(labels.isin(dtype.categories)), dtype=dtype)
+
+def _category_codes(series, dtype):
+    return _to_categorical(series, dtype).codes
+
+def normalize_site_inputs(df_sites):
+    """
+    Returns a copy of the site frame with voltage_level and meter_type
+    cleaned once and stored as categoricals (unknown values become NaN).
+    """
+    df = df_sites.copy()
+    df['voltage_level'] = _to_categorical(df['voltage_level'], VOLTAGE_DTYPE)
+    df['meter_type'] = _to_categorical(df['meter_type'], METER_DTYPE)
+    return df
+
+def determine_tcr_band_vectorized(df):
+    """
+    Vectorized version of determine_tcr_band. Classifies every site in the
+    frame in one pass and returns a Series of band labels aligned to df.
+    """
+    band_code = _band_codes(
+        df['agreed_capacity_kva'].fillna(0).to_numpy(),
+        df['annual_consumption_kwh'].fillna(0).to_numpy(),
+        _category_codes(df['meter_type'], METER_DTYPE),
+        _category_codes(df['voltage_level'], VOLTAGE_DTYPE),
+    )
+    return pd.Series(BAND_LABELS[band_code], index=df.index)
+
+def generate_tdr_lookup_key_vec(df, band_series):
+    """
+    Translates each site's calculated Band + Voltage into the specific Key
+    string found in the NESO TDR CSV (e.g., 'LV1', 'LV_NoMIC_2'), for the
+    whole frame at once. Returns None for 'Unclassified'.
+    """
+    band_num = band_series.astype(str).str.split(' ').str[-1]
+    voltage = _normalize_labels(df['voltage_level']).astype(str)
+    meter = _normalize_labels(df['meter_type'])
+    capacity = df['agreed_capacity_kva'].fillna(0)
+
+    # NHH and small HH usage -> 'LV_NoMIC_N', large HH usage -> 'LV1', 'HV3'...
+    nomic = (meter == 'NHH') | ((meter == 'HH') & (capacity == 0))
+    keys = np.where(nomic.to_numpy(), 'LV_NoMIC_' + band_num, voltage + band_num)
+
+    keys = pd.Series(keys, index=df.index, dtype=object)
+    return keys.mask(band_series == 'Unclassified', None)
 
 # Testing the logic
 data = {
@@ -108,39 +150,66 @@ print(df_sites[['site_id', 'voltage_level', 'agreed_capacity_kva', 'tcr_band']])
 
 def get_latest_forecast(df, group_cols):
     """
-    Sorts by Published_Date and keeps only the most recent forecast
+    Keeps only the most recent forecast (by Published_Date)
     for each unique combination of Year and Zone/Band.
     """
-    # Ensure date is datetime object
-    df['Published_Date'] = pd.to_datetime(df['Published_Date'], dayfirst=True)
+    # Published_Date is parsed to datetime on read (see RATE_FILE_SCHEMAS)
 
-    # Sort by grouping columns + descending date
-    df = df.sort_values(by=group_cols + ['Published_Date'], ascending=[True] * len(group_cols) + [False])
+    # Row label of the latest publication per group (a hash groupby, no full sort)
+    latest_idx = df.groupby(group_cols, sort=False)['Published_Date'].idxmax()
 
-    # Drop duplicates, keeping the first (latest) one
-    return df.drop_duplicates(subset=group_cols, keep='first').copy()
+    return df.loc[latest_idx].reset_index(drop=True)
 
-def load_and_clean_data():
+# Source CSVs for the rate tables
+RATE_FILES = ('tnuos_demand_hh.csv', 'tnuos_demand_nhh.csv', 'tnuos_tdr-tariffs.csv')
+
+# Explicit dtypes per CSV so pandas doesn't have to infer them
+# Rates stay float64 so the rounded £ costs are unchanged
+RATE_FILE_SCHEMAS = {
+    'tnuos_demand_hh.csv': {'Year_FY': 'int32', 'Zone_No': 'int16', 'HHTariff(Floored)_£/kW': 'float64'},
+    'tnuos_demand_nhh.csv': {'Year_FY': 'int32', 'Zone_No': 'int16', 'NHHTariff(Floored)_p/kWh': 'float64'},
+    'tnuos_tdr-tariffs.csv': {'Year_FY': 'int32', 'TDR Band': 'str'},
+}
+
+def read_rate_csv(path):
+    """
+    Reads a NESO tariff CSV with a fixed schema and parses the (UK format)
+    Published_Date. Raises ValueError if any date is not dd/mm/yyyy, since
+    picking the latest forecast on unparsed strings would silently be wrong.
+    """
+    df = pd.read_csv(path, engine='pyarrow', dtype=RATE_FILE_SCHEMAS[path])
+    df['Published_Date'] = pd.to_datetime(df['Published_Date'], format='%d/%m/%Y')
+    return df
+
+# Axis 1 of the TDR rate array, e.g. 'HV3' -> [:, 1, 2] and 'LV_NoMIC_1' -> [:, 3, 0]
+TDR_KEY_GROUPS = {'LV': 0, 'HV': 1, 'EHV': 2, 'LV_NoMIC_': 3}
+
+def _load_and_clean_data_impl():
     # Load CSV files
-    df_hh = pd.read_csv('tnuos_demand_hh.csv')
-    df_nhh = pd.read_csv('tnuos_demand_nhh.csv')
-    df_tdr = pd.read_csv('tnuos_tdr-tariffs.csv')
+    df_hh = read_rate_csv('tnuos_demand_hh.csv')
+    df_nhh = read_rate_csv('tnuos_demand_nhh.csv')
+    df_tdr = read_rate_csv('tnuos_tdr-tariffs.csv')
 
     # Clean half-hourly (locational) data
     # We need the year, zone, and tariff rate.
     # Note that 'HHTariff(Floored)_£/kW' is usually the final billable rate.
     print("Processing HH Tariffs...")
-    df_hh_clean = get_latest_forecast(df_hh, ['Year_FY', 'Zone_No'])
-    df_hh_clean = df_hh_clean[['Year_FY', 'Zone_No', 'HHTariff(Floored)_£/kW']].rename(
-        columns={'HHTariff(Floored)_£/kW': 'rate_locational_kw'}
-    )
+    # Build the cleaned frame straight from the columns (no select + rename copies)
+    df_hh_latest = get_latest_forecast(df_hh, ['Year_FY', 'Zone_No'])
+    df_hh_clean = pd.DataFrame({
+        'Year_FY': df_hh_latest['Year_FY'].to_numpy(),
+        'Zone_No': df_hh_latest['Zone_No'].to_numpy(),
+        'rate_locational_kw': df_hh_latest['HHTariff(Floored)_£/kW'].to_numpy(),
+    })
 
     # Clean non half-hourly (locational) data
     print("Processing NHH Tariffs...")
-    df_nhh_clean = get_latest_forecast(df_nhh, ['Year_FY', 'Zone_No'])
-    df_nhh_clean = df_nhh_clean[['Year_FY', 'Zone_No', 'NHHTariff(Floored)_p/kWh']].rename(
-        columns={'NHHTariff(Floored)_p/kWh': 'rate_locational_p_kwh'}
-    )
+    df_nhh_latest = get_latest_forecast(df_nhh, ['Year_FY', 'Zone_No'])
+    df_nhh_clean = pd.DataFrame({
+        'Year_FY': df_nhh_latest['Year_FY'].to_numpy(),
+        'Zone_No': df_nhh_latest['Zone_No'].to_numpy(),
+        'rate_locational_p_kwh': df_nhh_latest['NHHTariff(Floored)_p/kWh'].to_numpy(),
+    })
 
     # Clean TDR (residual) data
     # TDR has no zones (i.e. national rate), so we have to map the TDR Band to our logic.
@@ -149,36 +218,141 @@ def load_and_clean_data():
     # Fix encoding issues in column name if present
     rate_col = [c for c in df_tdr.columns if 'Tariff' in c][0]
 
-    df_tdr_clean = get_latest_forecast(df_tdr, ['Year_FY', 'TDR Band'])
-    df_tdr_clean = df_tdr_clean[['Year_FY', 'TDR Band', rate_col]].rename(
-        columns={rate_col: 'rate_residual_p_day'}
+    df_tdr_latest = get_latest_forecast(df_tdr, ['Year_FY', 'TDR Band'])
+    df_tdr_clean = pd.DataFrame({
+        'Year_FY': df_tdr_latest['Year_FY'].to_numpy(),
+        'TDR Band': df_tdr_latest['TDR Band'].to_numpy(),
+        'rate_residual_p_day': df_tdr_latest[rate_col].to_numpy(),
+    })
+
+    # Map the CSV TDR Band to our logic: Voltage (LV/HV/EHV) or small usage (LV_NoMIC_) + Band (1-4)
+    # Large usage (capacity): "HV3" -> group HV, band 3
+    # Small usage (consumption): "LV_NoMIC_1" -> group LV_NoMIC_, band 1
+    parts = df_tdr_clean['TDR Band'].astype(str).str.extract(r'^(LV|HV|EHV|LV_NoMIC_)([1-4])$')
+    df_tdr_clean['tdr_group'] = parts[0].map(TDR_KEY_GROUPS)
+    df_tdr_clean['band_no'] = pd.to_numeric(parts[1])
+
+    # Filter out 'Domestic', 'Unmetered', etc.
+    # (fresh index, so the table matches what comes back from the parquet cache)
+    df_tdr_clean = (
+        df_tdr_clean[parts[0].notna().to_numpy()]
+        .astype({'tdr_group': 'int8', 'band_no': 'int8'})
+        .reset_index(drop=True)
     )
 
-    # Create a 'lookup_key' to match the calculator logic
-    # Our Logic: Voltage (LV/HV/EHV) + Band (1-4) + Meter (NoMIC/MIC)
-    def map_tdr_band_to_key(raw_band):
-        # Map CSV keys to a standardized format: "{VOLTAGE}_Band{N}"
-        # Large usage (capacity) mapping:
-        if raw_band in ['LV1', 'LV2', 'LV3', 'LV4']:
-            return f"LV_Band{raw_band[-1]}"
-        elif raw_band in ['HV1', 'HV2', 'HV3', 'HV4']:
-            return f"HV_Band{raw_band[-1]}"
-        elif raw_band in ['EHV1', 'EHV2', 'EHV3', 'EHV4']:
-            return f"EHV_Band{raw_band[-1]}"
+    return df_hh_clean, df_nhh_clean, df_tdr_clean
 
-        # Small usage (consumption) mapping:
-        # "LV_NoMIC_1" -> "LV_NoMIC_Band1"
-        elif 'LV_NoMIC' in raw_band:
-            return f"LV_NoMIC_Band{raw_band.split('_')[-1]}"
+# On-disk cache of the cleaned rate tables, rebuilt whenever a source CSV is newer
+# Bump the version when the cleaning logic changes
+RATE_CACHE_DIR = '_cache'
+RATE_CACHE_VERSION = 2
+RATE_CACHE_FILES = tuple(
+    os.path.join(RATE_CACHE_DIR, f"{name}_rates_v{RATE_CACHE_VERSION}.parquet") for name in ('hh', 'nhh', 'tdr')
+)
 
-        return 'Ignore'
+def _read_rate_cache():
+    """
+    Returns the cached (HH, NHH, TDR) tables, or None if any cache file is
+    missing, unreadable or older than the source CSVs.
+    """
+    newest_csv = max(os.path.getmtime(f) for f in RATE_FILES)
+    if not all(os.path.exists(f) and os.path.getmtime(f) > newest_csv for f in RATE_CACHE_FILES):
+        return None
+    try:
+        return tuple(pd.read_parquet(f) for f in RATE_CACHE_FILES)
+    except Exception:
+        return None
 
-    df_tdr_clean['lookup_key'] = df_tdr_clean['TDR Band'].apply(map_tdr_band_to_key)
+def _write_rate_cache(tables):
+    try:
+        os.makedirs(RATE_CACHE_DIR, exist_ok=True)
+        for df_rates, path in zip(tables, RATE_CACHE_FILES):
+            df_rates.to_parquet(path, compression='zstd', index=False)
+    except OSError:
+        pass # e.g. read-only deployment, just skip the disk cache
+
+@functools.lru_cache(maxsize=1)
+def _load_and_clean_data_cached(file_mtimes):
+    tables = _read_rate_cache()
+    if tables is None:
+        tables = _load_and_clean_data_impl()
+        _write_rate_cache(tables)
+    return tables
 
-    # Filter out 'Domestic', 'Unmetered', etc.
-    df_tdr_clean = df_tdr_clean[df_tdr_clean['lookup_key'] != 'Ignore']
+def load_and_clean_data():
+    """
+    Returns the cleaned (HH, NHH, TDR) rate tables. The CSVs are parsed once
+    per process and only re-read when one of them changes on disk; between
+    processes the cleaned tables are reused from RATE_CACHE_DIR.
+    The frames are shared between callers, so treat them as read-only.
+    """
+    return _load_and_clean_data_cached(_rate_file_mtimes())
 
-    return df_hh_clean, df_nhh_clean, df_tdr_clean
+def _rate_file_mtimes():
+    return tuple(os.path.getmtime(f) for f in RATE_FILES)
+
+@functools.lru_cache(maxsize=1)
+def _rates_by_year_cached(file_mtimes):
+    return tuple(
+        {year: group for year, group in df_rates.groupby('Year_FY')}
+        for df_rates in _load_and_clean_data_cached(file_mtimes)
+    )
+
+@functools.lru_cache(maxsize=1)
+def _rate_arrays_cached(file_mtimes):
+    hh_by_year, nhh_by_year, tdr_by_year = _rates_by_year_cached(file_mtimes)
+
+    all_years = set(hh_by_year) | set(nhh_by_year) | set(tdr_by_year)
+    first_year = int(min(all_years))
+    n_years = int(max(all_years)) - first_year + 1
+    n_zones = int(max(max(g['Zone_No'].max() for g in by_year.values())
+                      for by_year in (hh_by_year, nhh_by_year))) + 1
+
+    # NaN wherever a year/zone/band has no published rate
+    hh_rate_kw = np.full((n_years, n_zones), np.nan)
+    nhh_rate_p_kwh = np.full((n_years, n_zones), np.nan)
+    tdr_rate_p_day = np.full((n_years, len(TDR_KEY_GROUPS), 4), np.nan)
+    has_year = np.zeros(n_years, dtype=bool)
+
+    for year in all_years:
+        y = int(year) - first_year
+        has_year[y] = year in hh_by_year and year in nhh_by_year and year in tdr_by_year
+
+        if year in hh_by_year:
+            g = hh_by_year[year]
+            hh_rate_kw[y, g['Zone_No'].to_numpy()] = g['rate_locational_kw'].to_numpy()
+        if year in nhh_by_year:
+            g = nhh_by_year[year]
+            nhh_rate_p_kwh[y, g['Zone_No'].to_numpy()] = g['rate_locational_p_kwh'].to_numpy()
+        if year in tdr_by_year:
+            g = tdr_by_year[year]
+            tdr_rate_p_day[y, g['tdr_group'].to_numpy(), g['band_no'].to_numpy() - 1] = g['rate_residual_p_day'].to_numpy()
+
+    return {
+        'first_year': first_year,
+        'has_year': has_year,
+        'hh_rate_kw': hh_rate_kw,
+        'nhh_rate_p_kwh': nhh_rate_p_kwh,
+        'tdr_rate_p_day': tdr_rate_p_day,
+    }
+
+def get_rate_arrays():
+    """
+    Returns the rate tables as dense numpy arrays for O(1) lookups:
+    HH/NHH rates indexed [year - first_year, Zone_No] and TDR rates indexed
+    [year - first_year, TDR_KEY_GROUPS[prefix], band - 1]. Treat as read-only.
+    """
+    return _rate_arrays_cached(_rate_file_mtimes())
+
+def _gather(rates, idx):
+    """
+    Returns rates[..., idx] per site, with NaN where idx is missing or outside the table.
+    Leading axes of rates (e.g. one row per year) are kept.
+    """
+    valid = (idx >= 0) & (idx < rates.shape[-1]) & (idx == np.floor(idx))
+    out = np.full(rates.shape[:-1] + (len(idx),), np.nan)
+    out[..., valid] = rates[..., idx[valid].astype(np.intp)]
+    return out
 
 # Execution
 df_hh_rates, df_nhh_rates, df_tdr_rates = load_and_clean_data()
@@ -188,77 +362,152 @@ print(f"Residual Rates (2026 Example):\n{df_tdr_rates[df_tdr_rates['Year_FY']==2
 
 # CALCULATION ENGINE
 
-def calculate_portfolio_impact(df_sites, target_year=2026):
+def compute_site_costs(capacity, consumption, meter_code, volt_code, zone, year_idx, rates):
     """
-    This function does the following:
-    1. Loads data
-    2. Maps sites -> bands -> keys
-    3. Merges rates
-    4. Calculates £ cost
+    Numeric core of the engine: plain arrays in, plain arrays out.
+    Takes per-site capacity/consumption, METER_DTYPE / VOLTAGE_DTYPE codes
+    and DNO zone, plus the year's index into get_rate_arrays(), and returns
+    (band_code, locational_rate, residual_rate, residual_cost, locational_cost, total_cost).
+    year_idx may also be an array of year indexes, in which case the rate and
+    cost arrays get a leading year axis: shape (n_years, n_sites).
     """
+    capacity_filled = np.nan_to_num(capacity, nan=0.0)
+    band_code = _band_codes(capacity_filled, np.nan_to_num(consumption, nan=0.0), meter_code, volt_code)
+
+    hh_mask = meter_code == METER_DTYPE.categories.get_loc('HH')
+    nhh_mask = meter_code == METER_DTYPE.categories.get_loc('NHH')
+
+    # Residual rates (fixed charge)
+    # Same key as 'tdr_key': NHH & small HH use the LV_NoMIC row, large HH their voltage row
+    nomic_mask = nhh_mask | (hh_mask & (capacity_filled == 0))
+    tdr_group = np.where(nomic_mask, TDR_KEY_GROUPS['LV_NoMIC_'], volt_code)
+    # Flat index into the year's (group, band) table; Unclassified / unknown voltage -> -1
+    tdr_year = rates['tdr_rate_p_day'][year_idx]
+    n_bands = tdr_year.shape[-1]
+    tdr_idx = np.where((tdr_group >= 0) & (band_code < n_bands), tdr_group * n_bands + band_code, -1)
+    res_rate = _gather(tdr_year.reshape(tdr_year.shape[:-2] + (-1,)), tdr_idx)
+
+    # Locational rates (zonal), HH and NHH have different rate tables
+    loc_rate = np.select(
+        [hh_mask, nhh_mask],
+        [_gather(rates['hh_rate_kw'][year_idx], zone), _gather(rates['nhh_rate_p_kwh'][year_idx], zone)],
+        default=0.0,
+    )
+
+    # HH Cost = Rate (£/kW) * Capacity (Using Capacity as a proxy for Triad)
+    # NHH Cost = Rate (p/kWh) * Consumption / 100
+    loc_cost = np.zeros(loc_rate.shape)
+    np.multiply(loc_rate, capacity, out=loc_cost, where=hh_mask)
+    np.multiply(loc_rate, consumption, out=loc_cost, where=nhh_mask)
+    np.divide(loc_cost, 100, out=loc_cost, where=nhh_mask)
+
+    # Residual Cost = daily rate * 365
+    res_cost = np.multiply(res_rate, 365)
 
-    # a. Load data
-    df_hh_rates, df_nhh_rates, df_tdr_rates = load_and_clean_data()
-    if df_hh_rates is None:
-        return df_tdr_rates # Error message
+    # Total Cost (a missing residual rate leaves the whole total at 0)
+    total_cost = np.add(res_cost, loc_cost)
 
-    # Filter rates for target year
-    hh_rates = df_hh_rates[df_hh_rates['Year_FY'] == target_year].copy()
-    nhh_rates = df_nhh_rates[df_nhh_rates['Year_FY'] == target_year].copy()
-    tdr_rates = df_tdr_rates[df_tdr_rates['Year_FY'] == target_year].copy()
+    # Cleanup formatting
+    for arr in (res_cost, loc_cost, total_cost):
+        np.nan_to_num(arr, copy=False, nan=0.0)
+        np.round(arr, 2, out=arr)
+
+    return band_code, loc_rate, res_rate, res_cost, loc_cost, total_cost
 
-    # b. Run classification logic on sites
-    df_calc = df_sites.copy()
-    df_calc['tcr_band'] = df_calc.apply(determine_tcr_band, axis=1)
-    df_calc['tdr_key'] = df_calc.apply(generate_tdr_lookup_key, axis=1)
+def _site_arrays(df_calc):
+    """
+    Per-site input arrays for compute_site_costs, from a frame that has been
+    through normalize_site_inputs.
+    """
+    return (
+        df_calc['agreed_capacity_kva'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df_calc['annual_consumption_kwh'].to_numpy(dtype=np.float64, na_value=np.nan),
+        df_calc['meter_type'].cat.codes.to_numpy(),
+        df_calc['voltage_level'].cat.codes.to_numpy(),
+        df_calc['dno_zone'].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
 
-    # c. Merge residual rates (fixed charge)
-    # Join on 'tdr_key' -> 'TDR Band'
-    df_calc = pd.merge(df_calc, tdr_rates, left_on='tdr_key', right_on='TDR Band', how='left')
+def _tariff_year_indexes(years, rates):
+    """
+    Index of each year into the get_rate_arrays() tables, or an error message
+    naming the first year that has no tariff data.
+    """
+    has_year = rates['has_year']
+    year_idx = np.asarray(years) - rates['first_year']
+    for year, idx in zip(years, year_idx):
+        if not 0 <= idx < len(has_year) or not has_year[idx]:
+            return f"No tariff data available for {year}"
+    return year_idx
 
-    # d. Merge locational rates (zonal)
-    # Split the merge because HH and NHH have different logic
+def calculate_portfolio_impact(df_sites, target_year=2026):
+    """
+    This function does the following:
+    1. Loads rates
+    2. Maps sites -> bands -> keys
+    3. Looks up rates
+    4. Calculates £ cost
+    """
+    results = calculate_portfolio_impact_years(df_sites, (target_year,))
+    if isinstance(results, str):
+        return results # Error message
+    return results[target_year]
 
-    # Init columns
-    df_calc['locational_rate'] = 0.0
-    df_calc['locational_cost_pound'] = 0.0
+def calculate_portfolio_impact_years(df_sites, years=(2026, 2027)):
+    """
+    Same as calculate_portfolio_impact, for several years at once.
+    Sites are normalised, classified and keyed once, and the rates for every
+    year are looked up in a single kernel pass.
+    Returns {year: result frame}.
+    """
 
-    # HH Merge
-    # HH Cost = Rate (£/kW) * Capacity (Using Capacity as a proxy for Triad)
-    hh_mask = df_calc['meter_type'] == 'HH'
-    if hh_mask.any():
-        temp_hh = pd.merge(df_calc[hh_mask], hh_rates, left_on='dno_zone', right_on='Zone_No', how='left')
-        # Update original dataframe using the index
-        df_calc.loc[hh_mask, 'locational_rate'] = temp_hh['rate_locational_kw'].values
-        # Calculation: Rate * Capacity
-        df_calc.loc[hh_mask, 'locational_cost_pound'] = (
-            df_calc.loc[hh_mask, 'locational_rate'] * df_calc.loc[hh_mask, 'agreed_capacity_kva']
-        )
+    # a. Load rates for the target years
+    rates = get_rate_arrays()
+    year_idx = _tariff_year_indexes(years, rates)
+    if isinstance(year_idx, str):
+        return year_idx # Error message
 
-    # NHH Merge
-    # NHH Cost = Rate (p/kWh) * Consumption / 100
-    nhh_mask = df_calc['meter_type'] == 'NHH'
-    if nhh_mask.any():
-        temp_nhh = pd.merge(df_calc[nhh_mask], nhh_rates, left_on='dno_zone', right_on='Zone_No', how='left')
-        df_calc.loc[nhh_mask, 'locational_rate'] = temp_nhh['rate_locational_p_kwh'].values
-        # Calculation: (Rate * Consumption) / 100
-        df_calc.loc[nhh_mask, 'locational_cost_pound'] = (
-            df_calc.loc[nhh_mask, 'locational_rate'] * df_calc.loc[nhh_mask, 'annual_consumption_kwh'] / 100
-        )
+    # b. Normalise site inputs
+    # Voltage / meter type become categoricals so the kernel works on integer codes
+    df_calc = normalize_site_inputs(df_sites)
 
-    # e. Final residual calculation
-    # Cost = daily rate * 365
-    df_calc['residual_cost_pound'] = df_calc['rate_residual_p_day'] * 365
+    # c. Classify sites, look up rates and calculate £ cost in one pass over the arrays
+    # Rate / cost arrays come back as (n_years, n_sites)
+    band_code, loc_rate, res_rate, res_cost, loc_cost, total_cost = compute_site_costs(
+        *_site_arrays(df_calc), year_idx, rates
+    )
 
-    # f. Total Cost
-    df_calc['total_tnuos_cost'] = df_calc['residual_cost_pound'] + df_calc['locational_cost_pound']
+    # d. Pack results back into the frame
+    # Band and key don't depend on the year, so they're set before splitting per year
+    df_calc['tcr_band'] = pd.Categorical.from_codes(band_code, dtype=BAND_DTYPE)
+    df_calc['tdr_key'] = generate_tdr_lookup_key_vec(df_calc, df_calc['tcr_band'])
+
+    results = {}
+    for i, year in enumerate(years):
+        # The last year reuses df_calc itself instead of another copy
+        df_year = df_calc if i == len(years) - 1 else df_calc.copy()
+        df_year['rate_residual_p_day'] = res_rate[i]
+        df_year['locational_rate'] = loc_rate[i]
+        df_year[['residual_cost_pound', 'locational_cost_pound', 'total_tnuos_cost']] = np.column_stack(
+            (res_cost[i], loc_cost[i], total_cost[i])
+        )
+        results[year] = df_year
 
-    # Cleanup formatting
-    df_calc['residual_cost_pound'] = df_calc['residual_cost_pound'].fillna(0).round(2)
-    df_calc['locational_cost_pound'] = df_calc['locational_cost_pound'].fillna(0).round(2)
-    df_calc['total_tnuos_cost'] = df_calc['total_tnuos_cost'].fillna(0).round(2)
+    return results
 
-    return df_calc
+def calculate_portfolio_impact_multi_year(df_sites, years):
+    """
+    Total TNUoS cost (£) per site for several years in a single pass.
+    Returns an (n_sites, n_years) array with columns in the order of years,
+    so portfolio totals per year are simply result.sum(axis=0).
+    """
+    rates = get_rate_arrays()
+    year_idx = _tariff_year_indexes(years, rates)
+    if isinstance(year_idx, str):
+        return year_idx # Error message
+
+    df_calc = normalize_site_inputs(df_sites)
+    *_, total_cost = compute_site_costs(*_site_arrays(df_calc), year_idx, rates)
+    return total_cost.T
 
 # TEST RUN
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
@@ -7,7 +8,8 @@ from fpdf import FPDF
 import tempfile
 
 # Import custom modules
-from tnuos_engine import calculate_portfolio_impact
+from tnuos_engine import (calculate_portfolio_impact, calculate_portfolio_impact_years,
+                          calculate_portfolio_impact_multi_year, determine_tcr_band_vectorized)
 from scenario_manager import ScenarioModeler
 
 # CONFIG & ASSETS
@@ -36,13 +38,85 @@ ZONE_COORDS = {
     14: {'lat': 50.7184, 'lon': -3.5339, 'name': 'South Western'},
 }
 
+# Selectbox labels for the DNO zones, e.g. "12 - London"
+ZONE_LABELS = {k: f"{k} - {v['name']}" for k, v in ZONE_COORDS.items()}
+
+# Same centroids as flat arrays indexed by zone id, so the heatmap can look them up in one step
+# Slot 0 holds the fallback for unknown zones (the middle of GB)
+_ZONE_LAT = np.array([54.0] + [ZONE_COORDS[i]['lat'] for i in range(1, 15)])
+_ZONE_LON = np.array([-2.0] + [ZONE_COORDS[i]['lon'] for i in range(1, 15)])
+_ZONE_NAME = np.array(['Unknown'] + [ZONE_COORDS[i]['name'] for i in range(1, 15)], dtype=object)
+
+# Dummy portfolio for the sample download / "Load sample" button
+SAMPLE_PORTFOLIO = pd.DataFrame({
+    'site_id': ['London_HQ_01', 'Manch_Factory_02', 'Leeds_Warehouse_03', 'Birm_DataCenter_04',
+                'Glasgow_Hub_05', 'Bristol_Office_06', 'Cardiff_Depot_07',
+                'Newcastle_Ind_08', 'Retail_Store_09', 'Retail_Store_10'],
+    'voltage_level': ['LV', 'HV', 'HV', 'EHV', 'LV', 'LV', 'LV', 'HV', 'LV', 'LV'],
+    'agreed_capacity_kva': [140, 500, 1200, 6500, 240, 90, 75, 2500, 0, 0],
+    'dno_zone': [12, 3, 4, 13, 1, 11, 8, 5, 2, 10],
+    'meter_type': ['HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'NHH', 'NHH'],
+    'annual_consumption_kwh': [0, 0, 0, 0, 0, 0, 0, 0, 15000, 35000]
+})
+
+# Fixed column types for uploaded portfolios, so the CSV parser doesn't have to infer them
+# kVA / kWh stay float so blanks and decimals still load
+PORTFOLIO_SCHEMA = {
+    'site_id': 'string',
+    'voltage_level': 'category',
+    'agreed_capacity_kva': 'float64',
+    'dno_zone': 'Int8',
+    'meter_type': 'category',
+    'annual_consumption_kwh': 'float64',
+}
+
+# Trajectory years: Baseline (2025/26) to the max available forecast (2030/31)
+TREND_YEARS = list(range(2026, 2032))
+
+# Bounds for the st.cache_data wrappers below. The data cache is shared by all sessions and
+# never evicts on its own, so each one keeps only recent results for a limited time
+CACHE_MAX_ENTRIES = 32
+CACHE_TTL_SECONDS = 3600
+
 # HELPER FUNCTIONS
 
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def cached_portfolio_impact(df_sites, target_year):
+    """Runs the pricing engine, cached on the site data + year so widget reruns don't recompute it."""
+    return calculate_portfolio_impact(df_sites, target_year=target_year)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def cached_portfolio_impact_years(df_sites, years):
+    """Full engine results for several years at once ({year: frame}), cached like above."""
+    return calculate_portfolio_impact_years(df_sites, years)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def cached_multi_year_costs(df_sites, years):
+    """Total cost per site (rows) and year (columns) from a single engine pass, cached like above."""
+    return calculate_portfolio_impact_multi_year(df_sites, years)
+
+def downcast_portfolio(df_sites):
+    """Shrinks a loaded portfolio to compact dtypes: categorical labels and the smallest int that fits each numeric column."""
+    return df_sites.astype({'voltage_level': 'category', 'meter_type': 'category'}).assign(**{
+        # Columns with blanks or decimals are left as float
+        col: pd.to_numeric(df_sites[col], downcast='integer')
+        for col in ('dno_zone', 'agreed_capacity_kva', 'annual_consumption_kwh')
+    })
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def cached_band_drop_opportunities(df_sites, year):
+    """Band drop opportunities, cached on the site data + year so every tab shares one modeler run."""
+    return ScenarioModeler(df_sites, year=year).identify_band_drop_opportunities()
+
+@st.cache_data(show_spinner=False)
+def sample_portfolio_csv():
+    """CSV bytes of the sample portfolio, encoded once instead of on every rerun."""
+    return SAMPLE_PORTFOLIO.to_csv(index=False).encode('utf-8')
+
 def create_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_data):
     """Generates a PDF summary of the risk analysis."""
     pdf = FPDF()
     pdf.add_page()
-    pdf.set_font("Arial", size=12)
 
     # Title
     pdf.set_font("Arial", 'B', 16)
@@ -51,7 +125,7 @@ def create_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_
 
     # Analytics
     pdf.set_font("Arial", 'B', 12)
-    pdf.cell(200, 10, txt=f"Portfolio Analytics: {len(df_sites)} Sites", ln=1)
+    pdf.cell(200, 10, txt=f"Portfolio Analytics: {summary_stats['site_count']} Sites", ln=1)
     pdf.set_font("Arial", size=11)
 
     baseline = summary_stats['baseline_cost']
@@ -60,10 +134,13 @@ def create_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_
     # Avoid division by zero error if baseline is 0
     pct = (increase / baseline * 100) if baseline > 0 else 0
 
-    pdf.cell(200, 8, txt=f"Baseline Portfolio Cost, 2025/26: £{baseline:,.2f}", ln=1)
-    pdf.cell(200, 8, txt=f"Forecast Portfolio Cost, 2026/27: £{forecast:,.2f}", ln=1)
-    pdf.cell(200, 8, txt=f"Net Increase: £{increase:,.2f} (+{pct:.1f}%)", ln=1)
-    pdf.cell(200, 8, txt=f"Number of High Risk Sites (>100% Rise): {summary_stats['high_risk_count']}", ln=1)
+    # Summary lines written as one block
+    pdf.multi_cell(0, 8, txt="\n".join([
+        f"Baseline Portfolio Cost, 2025/26: £{baseline:,.2f}",
+        f"Forecast Portfolio Cost, 2026/27: £{forecast:,.2f}",
+        f"Net Increase: £{increase:,.2f} (+{pct:.1f}%)",
+        f"Number of High Risk Sites (>100% Rise): {summary_stats['high_risk_count']}",
+    ]))
 
     pdf.ln(5)
 
@@ -154,15 +231,22 @@ def create_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_
     pdf.set_font("Arial", size=10)
 
     if not opportunities_df.empty:
-        # Iterate through the standardized columns created in ScenarioModeler
-        for index, row in opportunities_df.iterrows():
-            line = f"Site: {row['Site ID']} | Reduce by {row['Reduction Needed']} to drop band."
-            pdf.cell(200, 8, txt=line, ln=1)
+        # Build all lines from the standardized columns created in ScenarioModeler, then write them in one go
+        lines = ("Site: " + opportunities_df['Site ID'].astype(str)
+                 + " | Reduce by " + opportunities_df['Reduction Needed'].astype(str)
+                 + " to drop band.").tolist()
+        pdf.multi_cell(0, 8, txt="\n".join(lines))
     else:
         pdf.cell(200, 8, txt="No TCR band drop opportunity found within a 20% reduction threshold for this portfolio.", ln=1)
 
     return pdf.output(dest='S').encode('latin-1')
 
+# PDFs are the largest entries, so keep fewer of them
+@st.cache_data(show_spinner=False, max_entries=8, ttl=CACHE_TTL_SECONDS)
+def cached_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_data):
+    """create_pdf_report, cached so re-clicking with unchanged inputs skips the chart + PDF layout."""
+    return create_pdf_report(summary_stats, opportunities_df, df_waterfall_data, trend_data)
+
 # UI LAYOUT
 
 st.title("TNUoS Impact Calculator")
@@ -186,35 +270,39 @@ if analysis_mode == "Single Site":
     st.subheader("Quick Quote: Single Site Impact")
 
     # Inputs
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        s_volt = st.selectbox("Voltage Level", ["LV", "HV", "EHV"])
-        s_zone = st.selectbox("DNO Zone", list(range(1, 15)), format_func=lambda x: f"{x} - {ZONE_COORDS[x]['name']}")
-
-    with col2:
-        s_type = st.selectbox("Meter Type", ["HH", "NHH"])
-        s_cap = st.number_input("Agreed Capacity (kVA)", min_value=0, value=250)
-
-    with col3:
-        s_cons = st.number_input("Annual Consumption (kWh)", min_value=0, value=0)
-        year_options = {
-            "2026/27": 2027,
-            "2027/28": 2028,
-            "2028/29": 2029,
-            "2029/30": 2030,
-            "2030/31": 2031
-        }
-        s_target_label = st.selectbox("Target Forecast Year", list(year_options.keys()))
-        s_target_year = year_options[s_target_label]
+    # Grouped in a form so editing them doesn't rerun the engines until the user submits
+    with st.form("single_site_form"):
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            s_volt = st.selectbox("Voltage Level", ["LV", "HV", "EHV"])
+            s_zone = st.selectbox("DNO Zone", list(ZONE_LABELS), format_func=ZONE_LABELS.get)
+
+        with col2:
+            s_type = st.selectbox("Meter Type", ["HH", "NHH"])
+            s_cap = st.number_input("Agreed Capacity (kVA)", min_value=0, value=250)
+
+        with col3:
+            s_cons = st.number_input("Annual Consumption (kWh)", min_value=0, value=0)
+            year_options = {
+                "2026/27": 2027,
+                "2027/28": 2028,
+                "2028/29": 2029,
+                "2029/30": 2030,
+                "2030/31": 2031
+            }
+            s_target_label = st.selectbox("Target Forecast Year", list(year_options.keys()))
+            s_target_year = year_options[s_target_label]
+
+        submitted = st.form_submit_button("Calculate Impact")
 
     # Calculation
     # Handle Session State to keep results visible
     if "calc_triggered" not in st.session_state:
         st.session_state.calc_triggered = False
 
-    # If button is clicked, set the state to True
-    if st.button("Calculate Impact"):
+    # If the form is submitted, set the state to True
+    if submitted:
         st.session_state.calc_triggered = True
 
     # Check the STATE, not just the button
@@ -230,26 +318,26 @@ if analysis_mode == "Single Site":
             'annual_consumption_kwh': s_cons
         }])
 
-        # Initialize storage for the trend graph
-        trend_data = {}
-
-        # Loop from Baseline (2025/26) to the max available forecast (2030/31)
-        # using a spinner because multiple calculations might take a moment
+        # Price all trajectory years in one engine pass
+        # using a spinner because the calculation might take a moment
         with st.spinner("Running pricing engines..."):
-            for yr in range(2026, 2032):
-                res = calculate_portfolio_impact(single_site, target_year=yr)
-                cost = res['total_tnuos_cost'].values[0]
+            site_costs = cached_multi_year_costs(single_site, TREND_YEARS)
 
-                # Format year label (e.g., 2026 -> "2025/26")
-                label = f"{yr - 1}/{str(yr)[-2:]}"
-                trend_data[label] = cost
+        # The engine returns an error message if a year has no tariff data
+        if isinstance(site_costs, str):
+            st.error(site_costs)
+            st.stop()
+        site_costs = site_costs[0]
 
-                # Capture specific values for the Metrics
-                if yr == 2026:
-                    baseline_cost = cost
-                if yr == s_target_year:
-                    target_cost = cost
-                    target_band = res['tcr_band'].values[0]
+        # Storage for the trend graph
+        # Format year label (e.g., 2026 -> "2025/26")
+        trend_data = {f"{yr - 1}/{str(yr)[-2:]}": cost for yr, cost in zip(TREND_YEARS, site_costs)}
+
+        # Capture specific values for the Metrics
+        # (the TCR band depends on the site only, not the year)
+        baseline_cost = site_costs[TREND_YEARS.index(2026)]
+        target_cost = site_costs[TREND_YEARS.index(s_target_year)]
+        target_band = determine_tcr_band_vectorized(single_site).iloc[0]
 
         # Output metrics
         m1, m2, m3 = st.columns(3)
@@ -279,9 +367,8 @@ if analysis_mode == "Single Site":
 
         calculation_year = s_target_year
 
-        # Initialize Modeler with the Single Site data and the correct calculation year
-        modeler = ScenarioModeler(single_site, year=calculation_year)
-        opportunities = modeler.identify_band_drop_opportunities()
+        # Modeler for the Single Site data and the correct calculation year
+        opportunities = cached_band_drop_opportunities(single_site, calculation_year)
 
         if not opportunities.empty:
             st.success(f"Opportunity to drop to a lower TCR Band with <20% capacity reduction.")
@@ -308,22 +395,20 @@ if analysis_mode == "Single Site":
 
             factor = 1 + (sens_slider / 100)
 
-            # Apply factor
-            df_sens['annual_consumption_kwh'] = df_sens['annual_consumption_kwh'] * factor
-            df_sens['agreed_capacity_kva'] = df_sens['agreed_capacity_kva'] * factor
+            # Apply factor to both demand columns in one array op
+            demand_cols = ['annual_consumption_kwh', 'agreed_capacity_kva']
+            df_sens[demand_cols] = df_sens[demand_cols].to_numpy() * factor
 
             # Run Engine with the adjusted year
-            res_sens = calculate_portfolio_impact(df_sens, target_year=calculation_year)
+            res_sens = cached_portfolio_impact(df_sens, target_year=calculation_year)
 
             # Extract Results
             sens_total = res_sens['total_tnuos_cost'].values[0]
             new_band = res_sens['tcr_band'].values[0]
 
-            # Calculate baseline for this specific year (if not already stored)
-            # We re-run baseline for safety to ensure apples-to-apples comparison
-            res_base_check = calculate_portfolio_impact(single_site, target_year=calculation_year)
-            base_total_check = res_base_check['total_tnuos_cost'].values[0]
-            original_band = res_base_check['tcr_band'].values[0]
+            # Baseline for this specific year was already priced for the trajectory
+            base_total_check = trend_data[s_target_label]
+            original_band = target_band
 
             diff = sens_total - base_total_check
 
@@ -360,18 +445,7 @@ if analysis_mode == "Single Site":
 elif analysis_mode == "Portfolio":
     st.subheader("Portfolio Risk Dashboard")
 
-    # Generate dummy data
-    dummy = pd.DataFrame({
-        'site_id': ['London_HQ_01', 'Manch_Factory_02', 'Leeds_Warehouse_03', 'Birm_DataCenter_04',
-                    'Glasgow_Hub_05', 'Bristol_Office_06', 'Cardiff_Depot_07',
-                    'Newcastle_Ind_08', 'Retail_Store_09', 'Retail_Store_10'],
-        'voltage_level': ['LV', 'HV', 'HV', 'EHV', 'LV', 'LV', 'LV', 'HV', 'LV', 'LV'],
-        'agreed_capacity_kva': [140, 500, 1200, 6500, 240, 90, 75, 2500, 0, 0],
-        'dno_zone': [12, 3, 4, 13, 1, 11, 8, 5, 2, 10],
-        'meter_type': ['HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'HH', 'NHH', 'NHH'],
-        'annual_consumption_kwh': [0, 0, 0, 0, 0, 0, 0, 0, 15000, 35000]
-    })
-    csv = dummy.to_csv(index=False).encode('utf-8')
+    csv = sample_portfolio_csv()
 
     # File uploader & controls
     col_up, col_act = st.columns([2, 1])
@@ -387,7 +461,7 @@ elif analysis_mode == "Portfolio":
 
         # Button 2: Load sample
         if st.button("⚡ Load sample directly", use_container_width=True):
-            st.session_state['portfolio_data'] = dummy
+            # Only flag the source; the sample itself is the module-level SAMPLE_PORTFOLIO
             st.session_state['data_source'] = 'example'
 
     # Determine active data
@@ -395,13 +469,20 @@ elif analysis_mode == "Portfolio":
     df_sites = None
 
     if uploaded_file is not None:
-        df_sites = pd.read_csv(uploaded_file)
+        try:
+            df_sites = pd.read_csv(uploaded_file, engine='pyarrow', dtype=PORTFOLIO_SCHEMA)
+        except ValueError as e:
+            st.error(f"Could not read the portfolio CSV: {e}")
+            st.stop()
         # Clear example state to avoid confusion if user switches back and forth
         if 'data_source' in st.session_state:
             del st.session_state['data_source']
 
     elif st.session_state.get('data_source') == 'example':
-        df_sites = st.session_state['portfolio_data']
+        df_sites = SAMPLE_PORTFOLIO
+
+    if df_sites is not None:
+        df_sites = downcast_portfolio(df_sites)
 
     # Main analysis block
     if df_sites is not None:
@@ -409,8 +490,13 @@ elif analysis_mode == "Portfolio":
 
         # Calculation
         with st.spinner('Running Calculation Engine...'):
-            df_2026 = calculate_portfolio_impact(df_sites, target_year=2026)
-            df_2027 = calculate_portfolio_impact(df_sites, target_year=2027)
+            results = cached_portfolio_impact_years(df_sites, (2026, 2027))
+
+        # The engine returns an error message if a year has no tariff data
+        if isinstance(results, str):
+            st.error(results)
+            st.stop()
+        df_2026, df_2027 = results[2026], results[2027]
 
         # Calculate deltas
         total_2026 = df_2026['total_tnuos_cost'].sum()
@@ -424,15 +510,20 @@ elif analysis_mode == "Portfolio":
 
         # Count >100% Increases (high risk)
         # We compare 2026/27 vs 2025/26 to find high risk sites
-        risk_df = df_2027.copy()
-        risk_df['cost_2026'] = df_2026['total_tnuos_cost']
-        risk_df['pct_change'] = ((risk_df['total_tnuos_cost'] - risk_df['cost_2026']) / risk_df['cost_2026']) * 100
-        high_risk_count = len(risk_df[risk_df['pct_change'] > 100])
+        cost_2026 = df_2026['total_tnuos_cost'].to_numpy()
+        cost_2027 = df_2027['total_tnuos_cost'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_change = (cost_2027 - cost_2026) / cost_2026 * 100
+        high_risk_mask = pct_change > 100
+        high_risk_count = int(high_risk_mask.sum())
 
         kpi4.metric("High Risk Sites (>100% Rise)", high_risk_count, delta_color="inverse")
 
-        # Filter for the specific sites
-        high_risk_sites = risk_df[risk_df['pct_change'] > 100].copy()
+        # Filter for the specific sites (only the high risk subset is materialised)
+        high_risk_sites = df_2027.loc[high_risk_mask, ['site_id', 'total_tnuos_cost']].assign(
+            cost_2026=cost_2026[high_risk_mask],
+            pct_change=pct_change[high_risk_mask],
+        )
 
         if not high_risk_sites.empty:
             with st.expander("⚠️ View high risk sites"):
@@ -447,23 +538,19 @@ elif analysis_mode == "Portfolio":
                     }
                 )
 
-        # Initialize storage for the trend graph
-        trend_data_portfolio = {}
-        years_x = []
-        costs_y = []
-
-        # Loop from Baseline (2025/26) to the max available forecast (2030/31)
+        # Price all trajectory years in one engine pass, then total per year
         with st.spinner("Running pricing engines..."):
-            for yrs in range(2026, 2032):
-                res_portfolio = calculate_portfolio_impact(df_sites.copy(), target_year=yrs)
-                cost_portfolio = res_portfolio['total_tnuos_cost'].sum()
+            portfolio_costs = cached_multi_year_costs(df_sites, TREND_YEARS)
 
-                # Format year label (e.g., 2026 -> "2025/26")
-                label = f"{yrs - 1}/{str(yrs)[-2:]}"
-                trend_data_portfolio[label] = cost_portfolio
+        if isinstance(portfolio_costs, str):
+            st.error(portfolio_costs)
+            st.stop()
+        costs_y = list(portfolio_costs.sum(axis=0))
 
-                years_x.append(label)
-                costs_y.append(cost_portfolio)
+        # Storage for the trend graph
+        # Format year label (e.g., 2026 -> "2025/26")
+        years_x = [f"{yrs - 1}/{str(yrs)[-2:]}" for yrs in TREND_YEARS]
+        trend_data_portfolio = dict(zip(years_x, costs_y))
 
         col1, col2 = st.columns(2)
 
@@ -530,10 +617,15 @@ elif analysis_mode == "Portfolio":
                 'site_id': 'count'
             }).reset_index()
 
-            # Add Lat/Lon
-            map_data['lat'] = map_data['dno_zone'].map(lambda x: ZONE_COORDS.get(x, {}).get('lat', 54.0))
-            map_data['lon'] = map_data['dno_zone'].map(lambda x: ZONE_COORDS.get(x, {}).get('lon', -2.0))
-            map_data['zone_name'] = map_data['dno_zone'].map(lambda x: ZONE_COORDS.get(x, {}).get('name', 'Unknown'))
+            # Add Lat/Lon (unknown zones fall back to the middle of GB)
+            zones = map_data['dno_zone'].to_numpy(dtype=np.float64, na_value=np.nan)
+            zone_idx = np.where(np.isin(zones, list(ZONE_COORDS)), zones, 0).astype(np.intp)
+            map_data['lat'] = _ZONE_LAT[zone_idx]
+            map_data['lon'] = _ZONE_LON[zone_idx]
+            map_data['zone_name'] = _ZONE_NAME[zone_idx]
+
+            # One bubble per zone; trim precision so less JSON goes to the browser
+            map_data = map_data.round({'lat': 5, 'lon': 5}).astype({'total_tnuos_cost': 'float32'})
 
             # Map Visual
             fig_map = px.scatter_mapbox(
@@ -546,8 +638,7 @@ elif analysis_mode == "Portfolio":
 
         with tab2:
             st.markdown("### Optimisation Opportunities")
-            modeler = ScenarioModeler(df_sites, year=2026)
-            opportunities = modeler.identify_band_drop_opportunities()
+            opportunities = cached_band_drop_opportunities(df_sites, 2026)
 
             if not opportunities.empty:
                 st.success(f"Found {len(opportunities)} opportunities to drop to a lower TCR Band with <20% capacity reduction.")
@@ -562,13 +653,13 @@ elif analysis_mode == "Portfolio":
             if st.button("Generate PDF Report"):
                 # Prepare summary stats
                 stats = {
+                    'site_count': len(df_sites),
                     'baseline_cost': total_2026,
                     'forecast_cost': total_2027,
                     'high_risk_count': high_risk_count
                 }
-                # Use modeler to get opps for the report
-                mod = ScenarioModeler(df_sites, year=2026)
-                opps = mod.identify_band_drop_opportunities()
+                # Same opportunities as the Band Optimisation tab
+                opps = cached_band_drop_opportunities(df_sites, 2026)
 
                 # Prepare Data for Waterfall (Pass pure numbers, not the figure)
                 wf_start = total_2026
@@ -578,7 +669,7 @@ elif analysis_mode == "Portfolio":
                 waterfall_data_list = [wf_start, wf_diff1, wf_diff2, wf_end]
 
                 # Call the function
-                pdf_bytes = create_pdf_report(stats, opps, waterfall_data_list, trend_data_portfolio)
+                pdf_bytes = cached_pdf_report(stats, opps, waterfall_data_list, trend_data_portfolio)
 
                 st.download_button(
                     label="📄 Download PDF Report",